@@ -3,6 +3,21 @@ import math
 import random
 import os
 import json
+import csv
+import base64
+import zlib
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import compress
+from array import array
+from bisect import bisect_left
+
+try:
+    import orjson  # Optional faster JSON encoder/decoder for the tracking file
+except ImportError:
+    orjson = None
 
 # Global variables
 handlers = []
@@ -10,66 +25,70 @@ app = adsk.core.Application.get()
 if app:
     ui = app.userInterface
 
+# Default export locations, resolved once at import
+_DEFAULT_EXPORT_DIR = os.path.join(os.path.expanduser("~"), "Desktop", "stl_files")
+_DEFAULT_TRACKING_FILE = os.path.join(_DEFAULT_EXPORT_DIR, "bolt_tracking.json")
+
+# Random generator used for all bolt sampling; seeded from the tracking file when it has a "seed" entry
+_rng = random.Random()
+
+# Unit hexagon vertex offsets for the bolt head, scaled by the head radius per bolt
+_HEX_COS = [math.cos(math.pi * i / 3) for i in range(6)]
+_HEX_SIN = [math.sin(math.pi * i / 3) for i in range(6)]
+
 # Class to store bolt dimensions from CSV
 class BoltDimensions:
+    # Number of values stored per bolt in dims: body diameter, pitch, head diameter, body length, head height
+    DIMS_STRIDE = 5
+    
     def __init__(self):
         self.thread_sizes = []
-        self.body_diameters = []
-        self.pitches = []
-        self.head_diameters = []
-        self.body_lengths = []
-        self.head_heights = []
-        self.used_indices = set()  # Keep track of used bolt indices
+        self.body_diameters = array('d')  # Nominal body diameters in mm, used for thread sizing
+        self.dims = array('d')            # Row-major block of DIMS_STRIDE values per bolt, in cm
+        self.used_mask = bytearray()  # One byte per bolt index, set to 1 once the index is used
+        self._pool = None          # Shuffled unused indices, drawn from the end; None until next needed
         self.is_loaded = False     # Flag to track if data is loaded
         
     def load_from_csv(self, file_path):
         try:
-            # Check if file exists
-            if not os.path.exists(file_path):
-                if ui:
-                    ui.messageBox(f'CSV file not found: {file_path}')
-                return False
-                
             # Clear existing data if any
             self.thread_sizes = []
-            self.body_diameters = []
-            self.pitches = []
-            self.head_diameters = []
-            self.body_lengths = []
-            self.head_heights = []
-            # Do not clear used_indices here as we want to maintain that across CSV reloads
+            self.body_diameters = array('d')
+            self.dims = array('d')
+            self._pool = None
+            # Do not clear used_mask here as we want to maintain that across CSV reloads
+                
+            # Open and read the CSV file through a large buffer so big datasets are read in few system calls
+            with open(file_path, 'r', newline='', buffering=1 << 20) as file:
+                reader = csv.reader(file)
                 
-            # Open and read the CSV file
-            with open(file_path, 'r') as file:
                 # Skip header row
-                header = file.readline()
+                header = next(reader, None)
                 
                 # Read data rows
                 line_count = 0
-                for line in file:
+                for values in reader:
                     # Skip empty lines
-                    if not line.strip():
+                    if not any(value.strip() for value in values):
                         continue
                         
-                    # Parse CSV row (handle commas within fields)
-                    values = self._parse_csv_line(line)
-                    
                     if len(values) >= 6:  # Ensure we have enough values
                         try:
-                            self.thread_sizes.append(values[0])
-                            self.body_diameters.append(float(values[1]))
-                            self.pitches.append(float(values[2]))
-                            self.head_diameters.append(float(values[3]))
-                            self.body_lengths.append(float(values[4]))
-                            self.head_heights.append(float(values[5]))
-                            line_count += 1
+                            row = [float(value) for value in values[1:6]]
                         except ValueError as e:
                             if ui:
-                                ui.messageBox(f'Error parsing line: {line}\nError: {str(e)}')
+                                ui.messageBox(f'Error parsing line: {",".join(values)}\nError: {str(e)}')
                             continue
+                        self.thread_sizes.append(values[0].strip())
+                        self.body_diameters.append(row[0])
+                        self.dims.extend([value / 10 for value in row])  # mm -> cm
+                        line_count += 1
             
             self.is_loaded = line_count > 0
             
+            if len(self.used_mask) < line_count:
+                self.used_mask.extend(bytes(line_count - len(self.used_mask)))
+            
             if self.is_loaded:
                 if ui:
                     ui.messageBox(f'Successfully loaded {line_count} bolt dimensions from CSV.')
@@ -84,53 +103,55 @@ class BoltDimensions:
                 ui.messageBox(f'Error reading CSV file:\n{str(e)}')
             return False
     
-    def _parse_csv_line(self, line):
-        """Simple CSV parser that handles basic CSV format"""
-        result = []
-        in_quotes = False
-        current = ''
-        
-        for char in line:
-            if char == '"':
-                in_quotes = not in_quotes
-            elif char == ',' and not in_quotes:
-                result.append(current.strip())
-                current = ''
-            else:
-                current += char
-                
-        # Add the last field
-        if current:
-            result.append(current.strip())
-            
-        return result
+    def get_dimensions(self, index):
+        """Get (body diameter, pitch, head diameter, body length, head height) in cm for a bolt index"""
+        start = index * self.DIMS_STRIDE
+        return self.dims[start:start + self.DIMS_STRIDE]
     
     def set_used_indices(self, indices):
         """Set the used indices from an external source"""
-        self.used_indices = set(indices)
+        indices = list(indices)
+        size = max([len(self.body_diameters)] + [i + 1 for i in indices])
+        self.used_mask = bytearray(size)
+        for i in indices:
+            self.used_mask[i] = 1
+        # Rebuilt on the next draw, so loading the CSV and then setting used indices shuffles only once
+        self._pool = None
+    
+    def get_used_indices(self):
+        """Get a sorted list of all used indices"""
+        return list(compress(range(len(self.used_mask)), self.used_mask))
+    
+    def _reset_pool(self):
+        """Shuffle the unused indices once so each random draw is a pop instead of a set difference"""
+        used = self.used_mask
+        self._pool = [i for i in range(len(self.body_diameters)) if not used[i]]
+        _rng.shuffle(self._pool)
     
     def get_unused_indices(self):
         """Get a list of all unused indices"""
         if not self.is_loaded or len(self.body_diameters) == 0:
             return []
         
-        return list(set(range(len(self.body_diameters))) - self.used_indices)
+        if self._pool is None:
+            self._reset_pool()
+        return list(self._pool)
     
     def get_random_unused_bolt(self):
         """Get a random unused bolt index"""
         if not self.is_loaded or len(self.body_diameters) == 0:
             raise ValueError("No bolt dimensions loaded. Please load the CSV file first.")
             
-        available_indices = list(set(range(len(self.body_diameters))) - self.used_indices)
-        
-        if not available_indices:
+        if self._pool is None:
+            self._reset_pool()
+        if not self._pool:
             # All indices used, handle this situation
             if ui:
                 ui.messageBox('All bolt dimensions have been used. No more unique bolts can be created.')
             raise ValueError("No available bolt indices found. All indices have been used.")
             
-        index = random.choice(available_indices)
-        self.used_indices.add(index)
+        index = self._pool.pop()
+        self.used_mask[index] = 1
         return index
 
 # Global bolt dimensions instance
@@ -139,27 +160,18 @@ bolt_dimensions = BoltDimensions()
 # Function to ensure the export directory exists
 def ensure_export_directory(dir_path):
     """Create the export directory if it doesn't exist"""
-    if not os.path.exists(dir_path):
-        try:
-            os.makedirs(dir_path)
-            return True
-        except Exception as e:
-            if ui:
-                ui.messageBox(f'Failed to create directory: {dir_path}\nError: {str(e)}')
-            return False
-    return True
+    try:
+        os.makedirs(dir_path, exist_ok=True)
+        return True
+    except Exception as e:
+        if ui:
+            ui.messageBox(f'Failed to create directory: {dir_path}\nError: {str(e)}')
+        return False
 
 # Function to export a component as STL
-def export_as_stl(component, file_path):
-    """Export a component as an STL file"""
+def export_as_stl(exportMgr, component, file_path):
+    """Export a component as an STL file using the design's exportManager"""
     try:
-        # Get the active product
-        product = app.activeProduct
-        design = adsk.fusion.Design.cast(product)
-        
-        # Export the component using the design's exportManager
-        exportMgr = design.exportManager
-        
         # Create STL export options
         stlOptions = exportMgr.createSTLExportOptions(component)
         stlOptions.meshRefinement = adsk.fusion.MeshRefinementSettings.MeshRefinementMedium
@@ -174,26 +186,103 @@ def export_as_stl(component, file_path):
         return False
 
 # JSON tracking functions
+def pack_index_bitmap(indices):
+    """Pack indices into a zlib-compressed, base64-encoded bitmap (bit i % 8 of byte i // 8 marks index i)"""
+    indices = list(indices)
+    bits = bytearray((max(indices) >> 3) + 1 if indices else 0)
+    for i in indices:
+        bits[i >> 3] |= 1 << (i & 7)
+    return base64.b64encode(zlib.compress(bytes(bits))).decode('ascii')
+
+def unpack_index_bitmap(text):
+    """Unpack a bitmap written by pack_index_bitmap into a sorted list of indices"""
+    bits = zlib.decompress(base64.b64decode(text))
+    return [(pos << 3) + bit for pos, byte in enumerate(bits) if byte for bit in range(8) if byte >> bit & 1]
+
+def tracking_journal_path(file_path):
+    """Path of the append-only journal that records bolts exported since the last tracking file save"""
+    return file_path + '.log'
+
 def load_tracking_data(file_path):
-    """Load tracking data from JSON file"""
-    if os.path.exists(file_path):
-        try:
+    """Load tracking data from JSON file, then apply any bolts recorded in its journal"""
+    try:
+        if orjson is not None:
+            with open(file_path, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
             with open(file_path, 'r') as f:
                 data = json.load(f)
-            return data
-        except Exception as e:
-            if ui:
-                ui.messageBox(f'Error loading tracking file: {str(e)}')
-            return {"last_bolt": 0, "used_indices": []}
-    else:
+        # Used indices are stored as a bitmap; older tracking files hold a plain "used_indices" list
+        if "used_indices_bitmap" in data:
+            data["used_indices"] = unpack_index_bitmap(data.pop("used_indices_bitmap"))
+    except FileNotFoundError:
         # If file doesn't exist, create a new one with default values
-        return {"last_bolt": 0, "used_indices": []}
+        data = {"last_bolt": 0, "used_indices": []}
+    except Exception as e:
+        if ui:
+            ui.messageBox(f'Error loading tracking file: {str(e)}')
+        data = {"last_bolt": 0, "used_indices": []}
+    return replay_tracking_journal(file_path, data)
+
+def replay_tracking_journal(file_path, data):
+    """Add the bolts recorded in the journal (one "bolt_number index" line each) to the tracking data"""
+    try:
+        with open(tracking_journal_path(file_path), 'r') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return data
+    except Exception as e:
+        if ui:
+            ui.messageBox(f'Error reading tracking journal: {str(e)}')
+        return data
+    
+    journaled = {}
+    for line in lines:
+        # Skip a partially written last line left behind by a crash
+        fields = line.split()
+        if not line.endswith('\n') or len(fields) != 2:
+            continue
+        try:
+            bolt_num, index = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue
+        journaled[bolt_num] = index
+    
+    # Moves can finish out of order, so only resume through the unbroken run of bolt numbers after
+    # the snapshot; bolts past a gap are rebuilt rather than leaving the missing one skipped
+    used = set(data["used_indices"])
+    bolt_num = data["last_bolt"] + 1
+    while bolt_num in journaled:
+        index = journaled[bolt_num]
+        if index not in used:
+            used.add(index)
+            data["used_indices"].append(index)
+        data["last_bolt"] = bolt_num
+        bolt_num += 1
+    return data
 
 def save_tracking_data(file_path, data):
     """Save tracking data to JSON file"""
     try:
-        with open(file_path, 'w') as f:
-            json.dump(data, f)
+        # Store used indices as a compact bitmap so the file stays small as the dataset grows
+        data = dict(data)
+        data["used_indices_bitmap"] = pack_index_bitmap(data.pop("used_indices", []))
+        
+        # Write a new snapshot next to the old one and swap it in, so a crash never leaves a partial file
+        tmp_path = file_path + '.tmp'
+        if orjson is not None:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_SORT_KEYS))
+        else:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, file_path)
+        
+        # The snapshot now covers everything in the journal
+        try:
+            os.remove(tracking_journal_path(file_path))
+        except FileNotFoundError:
+            pass
         return True
     except Exception as e:
         if ui:
@@ -202,48 +291,77 @@ def save_tracking_data(file_path, data):
 
 # Main class for bolt creation
 class Bolt:
-    def __init__(self, position_x=0, position_y=0):
+    # Standard metric bolt sizes, used to round to a size that threads reliably
+    STD_SIZES = (1, 1.6, 2, 2.5, 3, 4, 5, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24, 27, 30, 33, 36, 39, 42, 45, 48)
+    
+    # Standard pitches for standard sizes (coarse thread)
+    PITCH_MAP = {
+        1: 0.25, 1.6: 0.35, 2: 0.4, 2.5: 0.45, 3: 0.5, 4: 0.7, 5: 0.8, 6: 1.0,
+        8: 1.25, 10: 1.5, 12: 1.75, 14: 2.0, 16: 2.0, 18: 2.5, 20: 2.5,
+        22: 2.5, 24: 3.0, 27: 3.0, 30: 3.5, 33: 3.5, 36: 4.0, 39: 4.0, 42: 4.5, 45: 4.5, 48: 5.0
+    }
+    
+    # Thread profiles picked at random for each bolt
+    THREAD_TYPES = ('ANSI Metric M Profile', 'GB Metric profile', 'ISO Metric profile')
+    
+    # Bolts only get external threads
+    _IS_INTERNAL = False
+    
+    # Full-turn revolve angle shared by every bolt, created on first use in buildBolt
+    _TWO_PI_VI = None
+    
+    # Thread designation that last succeeded for each (thread type, standard size)
+    _THREAD_CACHE = {}
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def closestStdSize(dia):
+        """Find the standard size closest to a body diameter in mm (dataset diameters repeat, so cache them)"""
+        sizes = Bolt.STD_SIZES
+        pos = bisect_left(sizes, dia)
+        if pos == 0:
+            return sizes[0]
+        if pos == len(sizes):
+            return sizes[-1]
+        # On a tie prefer the smaller size
+        lower, upper = sizes[pos - 1], sizes[pos]
+        return lower if dia - lower <= upper - dia else upper
+    
+    def __init__(self, position_x=0, position_y=0, name=None):
         try:
             # Get a random unused bolt index from our dataset
             self.index = bolt_dimensions.get_random_unused_bolt()
             
             # Get parameters from the CSV data based on the selected index
-            self._boltName = f'Bolt_{random.randint(1000, 9999)}'
-            self._headDiameter = bolt_dimensions.head_diameters[self.index] / 10  # cm
-            self._bodyDiameter = bolt_dimensions.body_diameters[self.index] / 10  # cm
-            self._headHeight = bolt_dimensions.head_heights[self.index] / 10  # cm
+            self._boltName = name if name is not None else f'Bolt_{_rng.randint(1000, 9999)}'
+            bodyDiameter, pitch, headDiameter, bodyLength, headHeight = bolt_dimensions.get_dimensions(self.index)
+            self._headDiameter = headDiameter  # cm
+            self._bodyDiameter = bodyDiameter  # cm
+            self._headHeight = headHeight  # cm
             
             # Store the raw value for bodyLength
-            self._bodyLengthValue = bolt_dimensions.body_lengths[self.index] / 10  # cm
+            self._bodyLengthValue = bodyLength  # cm
             
             # These values are derived from body diameter with some random variation as in original
-            self._cutAngle = (30.0 + random.uniform(-5, 5)) * (math.pi / 180)  # radians
-            self._chamferDistanceValue = (self._bodyDiameter * 0.0769) + random.uniform(-0.01, 0.01)
-            self._filletRadiusValue = (self._bodyDiameter * 0.05988) + random.uniform(-0.01, 0.01)
+            self._cutAngle = math.radians(30.0 + _rng.uniform(-5, 5))  # radians
+            self._chamferDistanceValue = (self._bodyDiameter * 0.0769) + _rng.uniform(-0.01, 0.01)
+            self._filletRadiusValue = (self._bodyDiameter * 0.05988) + _rng.uniform(-0.01, 0.01)
             
             # Position for placement in grid
             self.position_x = position_x
             self.position_y = position_y
             
             # Store thread specifications - Use standard sizes
-            self.threadType = random.choice(['ANSI Metric M Profile', 'GB Metric profile', 'ISO Metric profile'])  
+            self.threadType = _rng.choice(self.THREAD_TYPES)
             
             # Extract the numeric part for the thread designation
             # Round to standard metric bolt sizes to avoid thread creation errors
-            self.std_sizes = [1, 1.6, 2, 2.5, 3, 4, 5, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24, 27, 30, 33, 36, 39, 42, 45, 48]
             dia = bolt_dimensions.body_diameters[self.index]
             
             # Find the closest standard size
-            self.closest_size = min(self.std_sizes, key=lambda x: abs(x - dia))
-            
-            # Standard pitches for standard sizes (coarse thread)
-            self.pitch_map = {
-                1: 0.25, 1.6: 0.35, 2: 0.4, 2.5: 0.45, 3: 0.5, 4: 0.7, 5: 0.8, 6: 1.0,
-                8: 1.25, 10: 1.5, 12: 1.75, 14: 2.0, 16: 2.0, 18: 2.5, 20: 2.5,
-                22: 2.5, 24: 3.0, 27: 3.0, 30: 3.5, 33: 3.5, 36: 4.0, 39: 4.0, 42: 4.5, 45: 4.5, 48: 5.0
-            }
+            self.closest_size = Bolt.closestStdSize(dia)
             
-            self.std_pitch = self.pitch_map.get(self.closest_size, 1.5)  # Default to 1.5 if size not found
+            self.std_pitch = self.PITCH_MAP.get(self.closest_size, 1.5)  # Default to 1.5 if size not found
             
             # Use standard thread designation
             self.threadDesignation = f'M{self.closest_size}x{self.std_pitch}'
@@ -252,6 +370,9 @@ class Bolt:
             # Flag to track if thread creation was successful
             self.thread_created = False
             
+            # Occurrence created by buildBolt, kept so it can be deleted directly after export
+            self.newOcc = None
+            
         except Exception as e:
             if ui:
                 ui.messageBox(f'Error initializing bolt: {str(e)}')
@@ -314,52 +435,52 @@ class Bolt:
     def filletRadiusValue(self, value):
         self._filletRadiusValue = value
 
+    def _addThread(self, threads, faces, designation):
+        """Add a modeled thread with the given designation to the faces"""
+        threadInfo = threads.createThreadInfo(self._IS_INTERNAL, self.threadType, designation, self.threadClass)
+        threadInput = threads.createInput(faces, threadInfo)
+        threadInput.isModeled = True
+        threads.add(threadInput)
+
     def createThreads(self, newComp, sideFace):
         """Create threads with proper error handling and retry mechanism"""
         try:
             threads = newComp.features.threadFeatures
-            isInternal = False
             
-            # Try with the current thread designation
-            threadInfo = threads.createThreadInfo(isInternal, self.threadType, self.threadDesignation, self.threadClass)
+            # The same face collection is reused by the fallback attempts below
             faces = adsk.core.ObjectCollection.create()
             faces.add(sideFace)
-            threadInput = threads.createInput(faces, threadInfo)
-            threadInput.isModeled = True
-            threads.add(threadInput)
-            self.thread_created = True
-            return True
+            
+            # Try with the current thread designation first
+            designations = [self.threadDesignation]
+            
+            # If that fails, try with the next smaller size if current size is too large
+            available_sizes = [size for size in self.STD_SIZES if size < self.closest_size]
+            if available_sizes:
+                new_size = max(available_sizes)
+                new_pitch = self.PITCH_MAP.get(new_size, 1.0)
+                designations.append(f'M{new_size}x{new_pitch}')
+            else:
+                # Try with a simpler thread designation
+                designations.append(f'M{self.closest_size}')
+            
+            # Skip designations already known to fail by trying the one that last worked for this size first
+            cache_key = (self.threadType, self.closest_size)
+            cached_designation = Bolt._THREAD_CACHE.get(cache_key)
+            if cached_designation is not None:
+                designations.remove(cached_designation)
+                designations.insert(0, cached_designation)
         except Exception as e:
-            # First attempt failed, try with different thread parameters
+            return False
+        
+        for designation in designations:
             try:
-                # Try with the next smaller size if current size is too large
-                available_sizes = [size for size in self.std_sizes if size < self.closest_size]
-                if available_sizes:
-                    new_size = max(available_sizes)
-                    new_pitch = self.pitch_map.get(new_size, 1.0)
-                    new_designation = f'M{new_size}x{new_pitch}'
-                    
-                    threadInfo = threads.createThreadInfo(isInternal, self.threadType, new_designation, self.threadClass)
-                    faces = adsk.core.ObjectCollection.create()
-                    faces.add(sideFace)
-                    threadInput = threads.createInput(faces, threadInfo)
-                    threadInput.isModeled = True
-                    threads.add(threadInput)
-                    self.thread_created = True
-                    return True
-                else:
-                    # Try with a simpler thread designation
-                    basic_designation = f'M{self.closest_size}'
-                    threadInfo = threads.createThreadInfo(isInternal, self.threadType, basic_designation, self.threadClass)
-                    faces = adsk.core.ObjectCollection.create()
-                    faces.add(sideFace)
-                    threadInput = threads.createInput(faces, threadInfo)
-                    threadInput.isModeled = True
-                    threads.add(threadInput)
-                    self.thread_created = True
-                    return True
+                self._addThread(threads, faces, designation)
             except Exception as e:
-                return False
+                continue
+            Bolt._THREAD_CACHE[cache_key] = designation
+            self.thread_created = True
+            return True
         
         return False
 
@@ -370,6 +491,7 @@ class Bolt:
             transform = adsk.core.Matrix3D.create()
             transform.translation = adsk.core.Vector3D.create(self.position_x, self.position_y, 0)
             newOcc = allOccs.addNewComponent(transform)
+            self.newOcc = newOcc
             newComp = newOcc.component
             
             if newComp is None:
@@ -382,11 +504,9 @@ class Bolt:
             xzPlane = newComp.xZConstructionPlane
             sketch = sketches.add(xyPlane)
             center = adsk.core.Point3D.create(0, 0, 0)
-            vertices = []
-            for i in range(0, 6):
-                vertex = adsk.core.Point3D.create(center.x + (self.headDiameter/2) * math.cos(math.pi * i / 3), 
-                                               center.y + (self.headDiameter/2) * math.sin(math.pi * i / 3), 0)
-                vertices.append(vertex)
+            headRadius = self.headDiameter/2
+            vertices = [adsk.core.Point3D.create(center.x + headRadius * _HEX_COS[i], center.y + headRadius * _HEX_SIN[i], 0)
+                        for i in range(0, 6)]
 
             for i in range(0, 6):
                 sketch.sketchCurves.sketchLines.addByTwoPoints(vertices[(i+1) %6], vertices[i])
@@ -473,7 +593,9 @@ class Bolt:
             revolves = newComp.features.revolveFeatures
             revProf1 = revolveSketchTwo.profiles[0]
             revInput1 = revolves.createInput(revProf1, zaxis, adsk.fusion.FeatureOperations.CutFeatureOperation)
-            revAngle = adsk.core.ValueInput.createByReal(math.pi*2)
+            if Bolt._TWO_PI_VI is None:
+                Bolt._TWO_PI_VI = adsk.core.ValueInput.createByReal(math.pi*2)
+            revAngle = Bolt._TWO_PI_VI
             revInput1.setAngleExtent(False, revAngle)
             revolves.add(revInput1)
 
@@ -539,7 +661,7 @@ class BatchBoltCommandExecuteHandler(adsk.core.CommandEventHandler):
             # Get default export directory if not specified
             if not export_dir:
                 # Use desktop by default
-                export_dir = os.path.join(os.path.expanduser("~"), "Desktop", "stl_files")
+                export_dir = _DEFAULT_EXPORT_DIR
             
             # Get default tracking file if not specified
             if not tracking_file:
@@ -552,16 +674,26 @@ class BatchBoltCommandExecuteHandler(adsk.core.CommandEventHandler):
                 return
             
             # Validate and load CSV file
-            if not csv_path:
+            if not csv_path or not os.path.exists(csv_path):
                 ui.messageBox('Please provide a valid CSV file path.')
                 args.isValidResult = False
                 return
                 
             # Load tracking data
+            journal_file = tracking_journal_path(tracking_file)
+            had_journal = os.path.exists(journal_file)
             tracking_data = load_tracking_data(tracking_file)
+            
+            # Fold bolts recovered from an interrupted run into the snapshot before anything can return early
+            if had_journal:
+                save_tracking_data(tracking_file, tracking_data)
             last_bolt_num = tracking_data["last_bolt"]
             used_indices = tracking_data["used_indices"]
             
+            # Make the run reproducible when the tracking file pins a seed
+            if "seed" in tracking_data:
+                _rng.seed(tracking_data["seed"])
+            
             # Calculate the current batch based on last_bolt_num
             current_batch = (last_bolt_num // 250) + 1
             if current_batch > 4:  # Already completed all 1000 bolts
@@ -569,9 +701,8 @@ class BatchBoltCommandExecuteHandler(adsk.core.CommandEventHandler):
                 args.isValidResult = False
                 return
                 
-            # Calculate how many bolts to create in this batch
-            bolts_remaining = 1000 - last_bolt_num
-            bolts_to_create = min(250, bolts_remaining)
+            # Calculate how many bolts to create in this batch (fewer than 250 when resuming an interrupted batch)
+            bolts_to_create = min(current_batch * 250, 1000) - last_bolt_num
             
             start_bolt_num = last_bolt_num + 1
             end_bolt_num = start_bolt_num + bolts_to_create - 1
@@ -581,29 +712,29 @@ class BatchBoltCommandExecuteHandler(adsk.core.CommandEventHandler):
                 ui.messageBox(f'Failed to load bolt dimensions from {csv_path}. Please check the file path and format.')
                 args.isValidResult = False
                 return
-            
-            # Make sure data was loaded successfully
-            if not bolt_dimensions.is_loaded:
-                ui.messageBox('No data was loaded from the CSV file.')
-                args.isValidResult = False
-                return
                 
             # Set the used indices from tracking file
             bolt_dimensions.set_used_indices(used_indices)
             
             # Create bolts and export them
-            result = self.createAndExportBolts(bolts_to_create, spacing, create_threads, export_dir, 
-                                               start_bolt_num=start_bolt_num)
+            last_exported = self.createAndExportBolts(bolts_to_create, spacing, create_threads, export_dir, 
+                                                      start_bolt_num=start_bolt_num,
+                                                      journal_file=journal_file)
+            result = last_exported >= start_bolt_num
             
             if result:
-                # Update tracking data with new information
-                tracking_data["last_bolt"] = end_bolt_num
-                tracking_data["used_indices"] = list(bolt_dimensions.used_indices)
+                # Update tracking data with new information; a cancelled or short batch records only
+                # the bolts that were actually exported so the next run resumes after them
+                tracking_data["last_bolt"] = last_exported
+                tracking_data["used_indices"] = bolt_dimensions.get_used_indices()
                 save_tracking_data(tracking_file, tracking_data)
                 
                 # Display information about the current batch and next batch
                 next_batch = current_batch + 1
-                if next_batch <= 4:
+                if last_exported < end_bolt_num:
+                    ui.messageBox(f'Stopped batch {current_batch} after bolt {last_exported} (bolts {start_bolt_num}-{last_exported}).\n\n'
+                                 f'Next run will resume batch {current_batch} at bolt {last_exported + 1}.')
+                elif next_batch <= 4:
                     next_start = end_bolt_num + 1
                     next_end = next_start + 249
                     ui.messageBox(f'Completed batch {current_batch} (bolts {start_bolt_num}-{end_bolt_num}).\n\n'
@@ -619,11 +750,12 @@ class BatchBoltCommandExecuteHandler(adsk.core.CommandEventHandler):
                 ui.messageBox(f'Failed:\n{str(e)}\n\n{traceback.format_exc()}')
             args.isValidResult = False
 
-    def createAndExportBolts(self, count, spacing, create_threads=True, export_dir="", start_bolt_num=1):
+    def createAndExportBolts(self, count, spacing, create_threads=True, export_dir="", start_bolt_num=1, journal_file=""):
         # Get the active design
         product = app.activeProduct
         design = adsk.fusion.Design.cast(product)
         rootComp = design.rootComponent
+        exportMgr = design.exportManager
         
         # Create the specified number of bolts
         success_count = 0
@@ -635,6 +767,10 @@ class BatchBoltCommandExecuteHandler(adsk.core.CommandEventHandler):
         max_attempts = count * 3  # Allow up to 3x attempts to handle thread failures
         attempts = 0
         
+        # Only refresh the progress dialog and pump UI events every few attempts
+        refresh_interval = 10
+        total_str = f' of {start_bolt_num + count - 1}'
+        
         # Create a progress dialog
         progressDialog = ui.createProgressDialog()
         progressDialog.cancelButtonText = 'Cancel'
@@ -645,12 +781,47 @@ class BatchBoltCommandExecuteHandler(adsk.core.CommandEventHandler):
         progressDialog.maximumValue = count
         progressDialog.isCancelButtonShown = True
         
+        # Fusion writes each STL into a local staging directory on the main thread; moving it into
+        # export_dir (which may be a slow or synced folder) happens in the background while the
+        # next bolt is built. Both are set up inside the try below so the dialog is always hidden.
+        staging_dir = None
+        mover = None
+        pending_moves = []   # (move future, bolt number, bolt index) for every submitted move
+        unjournaled = []     # Entries of pending_moves whose bolt has not been journaled yet
+        export_prefix = os.path.join(export_dir, 'bolt_')
+        
+        # Record each bolt once its STL has reached export_dir so an interrupted batch can be resumed.
+        # Line buffering pushes every entry to the OS as soon as it is written.
+        journal = None
+        if journal_file:
+            try:
+                journal = open(journal_file, 'a', buffering=1)
+            except OSError:
+                # Without a journal the batch still runs; progress is saved when it finishes
+                journal = None
+        
+        def journal_finished_moves():
+            """Journal the bolts whose move has finished successfully; failed moves are never journaled"""
+            still_pending = []
+            for entry in unjournaled:
+                move, bolt_num, index = entry
+                if not move.done():
+                    still_pending.append(entry)
+                elif move.exception() is None and journal is not None:
+                    journal.write(f'{bolt_num} {index}\n')
+            unjournaled[:] = still_pending
+        
         try:
+            staging_dir = tempfile.mkdtemp(prefix='bolt_stl_')
+            staging_prefix = os.path.join(staging_dir, 'bolt_')
+            mover = ThreadPoolExecutor(max_workers=2)
+            
             while success_count < count and attempts < max_attempts:
                 # Update progress dialog
-                progressDialog.progressValue = success_count
-                progressDialog.message = f'Processing bolt {start_bolt_num + success_count} of {start_bolt_num + count - 1}'
-                adsk.doEvents()  # Process events to keep UI responsive
+                if attempts % refresh_interval == 0:
+                    progressDialog.progressValue = success_count
+                    progressDialog.message = f'Processing bolt {start_bolt_num + success_count}' + total_str
+                    adsk.doEvents()  # Process events to keep UI responsive
                 
                 # Check for cancel
                 if progressDialog.wasCancelled:
@@ -659,22 +830,22 @@ class BatchBoltCommandExecuteHandler(adsk.core.CommandEventHandler):
                 # Create a new bolt with unique parameters
                 try:
                     # Create bolt at a dummy position since we're only exporting
-                    bolt = Bolt(0, 0)
                     current_bolt_num = start_bolt_num + success_count
-                    bolt.boltName = f'bolt_{current_bolt_num}'
+                    bolt = Bolt(0, 0, name=f'bolt_{current_bolt_num}')
                     component = bolt.buildBolt(rootComp)
                     
                     # Check if the bolt was successfully created with threads
                     if component is not None:
                         # Export as STL
-                        stl_path = os.path.join(export_dir, f'bolt_{current_bolt_num}.stl')
-                        if export_as_stl(component, stl_path):
+                        staged_path = f'{staging_prefix}{current_bolt_num}.stl'
+                        if export_as_stl(exportMgr, component, staged_path):
                             export_count += 1
+                            stl_path = f'{export_prefix}{current_bolt_num}.stl'
+                            entry = (mover.submit(shutil.move, staged_path, stl_path), current_bolt_num, bolt.index)
+                            pending_moves.append(entry)
+                            unjournaled.append(entry)
                             # Delete the component from the workspace after export
-                            for occ in rootComp.occurrences:
-                                if occ.component.name == component.name:
-                                    occ.deleteMe()
-                                    break
+                            bolt.newOcc.deleteMe()
                         success_count += 1
                     else:
                         retry_count += 1
@@ -683,12 +854,31 @@ class BatchBoltCommandExecuteHandler(adsk.core.CommandEventHandler):
                     # Avoid showing message boxes during processing as they block the UI
                     # We'll report failures at the end
                 
+                journal_finished_moves()
                 attempts += 1
         finally:
             # Close progress dialog
             progressDialog.hide()
+            
+            # Wait for the remaining files to reach the export directory
+            if mover is not None:
+                mover.shutdown(wait=True)
+            elif staging_dir is not None:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            
+            if journal is not None:
+                journal_finished_moves()
+                journal.close()
+        
+        move_failures = sum(1 for move, _, _ in pending_moves if move.exception() is not None)
+        export_count -= move_failures
+        error_count += move_failures
+        if move_failures == 0:
+            shutil.rmtree(staging_dir, ignore_errors=True)
         
         message = f'Created and exported {export_count} bolts successfully to {export_dir}'
+        if move_failures > 0:
+            message += f' ({move_failures} STL files could not be moved and were left in {staging_dir})'
         if retry_count > 0:
             message += f' (discarded {retry_count} bolts that failed thread creation)'
         if error_count > 0:
@@ -696,8 +886,12 @@ class BatchBoltCommandExecuteHandler(adsk.core.CommandEventHandler):
         
         ui.messageBox(message)
         
-        # Return True if we successfully created at least one bolt
-        return export_count > 0
+        # Return the last bolt number up to which every bolt's STL reached export_dir
+        exported = {bolt_num for move, bolt_num, _ in pending_moves if move.exception() is None}
+        last_exported = start_bolt_num - 1
+        while last_exported + 1 in exported:
+            last_exported += 1
+        return last_exported
 
 class BatchBoltCommandDestroyHandler(adsk.core.CommandEventHandler):
     def __init__(self):
@@ -749,13 +943,11 @@ class BatchBoltCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             createThreadsInput.tooltip = 'Enable/disable thread creation (disable if threads are causing errors)'
             
             # Export directory input with default to desktop
-            defaultExportDir = os.path.join(os.path.expanduser("~"), "Desktop", "stl_files")
-            exportDirInput = inputs.addStringValueInput('exportDir', 'Export Directory', defaultExportDir)
+            exportDirInput = inputs.addStringValueInput('exportDir', 'Export Directory', _DEFAULT_EXPORT_DIR)
             exportDirInput.tooltip = 'Directory to export STL files (default is Desktop/stl_files)'
             
             # Tracking file input
-            defaultTrackingFile = os.path.join(defaultExportDir, "bolt_tracking.json")
-            trackingFileInput = inputs.addStringValueInput('trackingFile', 'Tracking File', defaultTrackingFile)
+            trackingFileInput = inputs.addStringValueInput('trackingFile', 'Tracking File', _DEFAULT_TRACKING_FILE)
             trackingFileInput.tooltip = 'JSON file to track bolt creation progress across multiple runs'
             
             # Add informative text input
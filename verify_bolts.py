@@ -1,67 +1,147 @@
 import json
 import csv
 import os
+import base64
+import zlib
+import struct
+from array import array
+from statistics import fmean
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson  # Optional faster JSON parser for the tracking file
+except ImportError:
+    orjson = None
 
 # Paths
 csv_path = "/Users/charanrathore/Desktop/Shuffled_Expanded1.csv"  # Update this
 tracking_file = "/Users/charanrathore/Desktop/bolt_tracking.json"  # Update this
 stl_files_dir = "/Users/charanrathore/Desktop/stl_files"  # Update this
 
-# Check if all 1000 STL files exist
-stl_files = [f for f in os.listdir(stl_files_dir) if f.endswith('.stl')]
-print(f"Found {len(stl_files)} STL files (should be 1000)")
+def unpack_index_bitmap(text):
+    """Unpack the used-indices bitmap written by test.py into a sorted list of indices"""
+    bits = zlib.decompress(base64.b64decode(text))
+    return [(pos << 3) + bit for pos, byte in enumerate(bits) if byte for bit in range(8) if byte >> bit & 1]
+
+# Check if all 1000 STL files exist, keeping the directory entries to read their sizes
+with os.scandir(stl_files_dir) as entries:
+    stl_entries = [entry for entry in entries if entry.name[-4:] == '.stl' and entry.is_file()]
+
+# stat() releases the GIL, so spread the calls over threads to overlap latency on network drives
+with ThreadPoolExecutor(max_workers=16) as executor:
+    sizes = array('q', executor.map(lambda entry: entry.stat().st_size, stl_entries))
+print(f"Found {len(sizes)} STL files (should be 1000)")
 
 # Load tracking data
-with open(tracking_file, 'r') as f:
-    tracking_data = json.load(f)
+if orjson is not None:
+    with open(tracking_file, 'rb') as f:
+        tracking_data = orjson.loads(f.read())
+else:
+    with open(tracking_file, 'r') as f:
+        tracking_data = json.load(f)
 
-used_indices = tracking_data["used_indices"]
+# Newer tracking files store used indices as a bitmap, older ones as a plain list.
+# A bitmap cannot hold an index twice, so only the list format needs a duplicate check.
+if "used_indices_bitmap" in tracking_data:
+    used_indices = unpack_index_bitmap(tracking_data["used_indices_bitmap"])
+    has_duplicate_indices = False
+else:
+    used_indices = tracking_data["used_indices"]
+    has_duplicate_indices = len(used_indices) != len(set(used_indices))
 last_bolt_num = tracking_data["last_bolt"]
 
+# A run that was interrupted leaves its exported bolts in the journal next to the tracking file;
+# apply them the same way test.py does on its next run (only the unbroken run after last_bolt)
+journal_file = tracking_file + '.log'
+if os.path.exists(journal_file):
+    journaled = {}
+    with open(journal_file, 'r') as f:
+        for line in f:
+            fields = line.split()
+            if not line.endswith('\n') or len(fields) != 2:
+                continue
+            try:
+                journaled[int(fields[0])] = int(fields[1])
+            except ValueError:
+                continue
+    used_indices = list(used_indices)
+    used_set = set(used_indices)
+    journal_start = last_bolt_num
+    while last_bolt_num + 1 in journaled:
+        last_bolt_num += 1
+        if journaled[last_bolt_num] not in used_set:
+            used_set.add(journaled[last_bolt_num])
+            used_indices.append(journaled[last_bolt_num])
+    print(f"Applied {last_bolt_num - journal_start} bolts from tracking journal {journal_file} "
+          f"(not yet saved to the tracking file)")
+
 print(f"Last bolt number: {last_bolt_num} (should be 1000)")
 print(f"Number of used indices: {len(used_indices)} (should be 1000)")
 
 # Check for duplicates in used indices
-if len(used_indices) != len(set(used_indices)):
+if has_duplicate_indices:
     print("WARNING: Duplicate indices found in tracking file!")
 else:
     print("No duplicate indices found in tracking file.")
 
-# Load CSV and extract dimensions for each used index
-dimensions = []
-with open(csv_path, 'r') as file:
-    # Skip header
-    next(file)
+# Stream the CSV and keep only the dimensions of used rows, each packed into one 40-byte key
+# that hashes and compares as a single buffer
+dims_struct = struct.Struct('<5d')
+wanted = frozenset(used_indices)
+last_wanted = max(wanted, default=-1)
+dims_by_index = {}
+with open(csv_path, 'r', newline='') as file:
+    reader = csv.reader(file)
     
-    # Read all rows
-    rows = list(csv.reader(file))
+    # Skip header
+    next(reader, None)
     
-    # Extract dimensions for each used index
-    for idx in used_indices:
-        if idx < len(rows):
-            dim = tuple(float(val) for val in rows[idx][1:6])  # Convert to float for comparison
-            dimensions.append((idx, dim))
+    # Number rows the way test.py does: blank, short and unparseable rows get no index
+    idx = -1
+    for row in reader:
+        if len(row) < 6:
+            continue
+        try:
+            dims = dims_struct.pack(*map(float, row[1:6]))  # Convert to float for comparison
+        except ValueError:
+            continue
+        idx += 1
+        if idx in wanted:
+            dims_by_index[idx] = dims
+        # No used index lies beyond this row, so the rest of the file can be skipped
+        if idx >= last_wanted:
+            break
 
-# Check for duplicates in dimensions
-dim_set = set()
-duplicates = []
-for idx, dim in dimensions:
-    if dim in dim_set:
-        duplicates.append((idx, dim))
-    dim_set.add(dim)
+if len(dims_by_index) < len(wanted):
+    print(f"WARNING: {len(wanted) - len(dims_by_index)} used indices are beyond the last valid CSV row")
+
+# Check the dimensions of each used index for duplicates
+seen_dims = set()
+duplicates = array('q')  # Only the indices; their dimensions are looked up again when printed
+for idx in used_indices:
+    dim = dims_by_index.get(idx)
+    if dim is None:
+        continue
+    # A single hash per row: the set only stays the same size when dim was already in it
+    seen_count = len(seen_dims)
+    seen_dims.add(dim)
+    if len(seen_dims) == seen_count:
+        duplicates.append(idx)
 
 if duplicates:
     print(f"WARNING: Found {len(duplicates)} bolts with duplicate dimensions!")
-    for idx, dim in duplicates[:5]:  # Show first 5 duplicates
-        print(f"  Index {idx}: {dim}")
+    for idx in duplicates[:5]:  # Show first 5 duplicates
+        print(f"  Index {idx}: {dims_struct.unpack(dims_by_index[idx])}")
     if len(duplicates) > 5:
         print(f"  ... and {len(duplicates) - 5} more")
 else:
     print("SUCCESS: All bolts have unique dimensions!")
 
 # Print file size distribution as a basic check
-sizes = [os.path.getsize(os.path.join(stl_files_dir, f)) for f in stl_files]
-avg_size = sum(sizes) / len(sizes)
-min_size = min(sizes)
-max_size = max(sizes)
-print(f"STL file sizes: Min={min_size}, Max={max_size}, Avg={avg_size:.2f}")
\ No newline at end of file
+if sizes:
+    avg_size = fmean(sizes)
+    min_size = min(sizes)
+    max_size = max(sizes)
+    print(f"STL file sizes: Min={min_size}, Max={max_size}, Avg={avg_size:.2f}")
+else:
+    print("STL file sizes: no STL files found")
\ No newline at end of file